@@ -1,6 +1,6 @@
 # src/pylo/__init__.py
-from .logger import get_logger
+from .logger import get_logger, log_if
 
 # Fixes any Ruff or Pyright warnings
 # due to not using the import
-__all__ = ["get_logger"]
+__all__ = ["get_logger", "log_if"]
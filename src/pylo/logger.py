@@ -2,10 +2,17 @@
 # Wrapper for the standard Python implementation of logging.
 # It acts a singleton (if same name is present) passed around
 # to avoid duplicate loggers.
+import atexit
+import copy
 import logging
-import inspect
+import logging.handlers
 import os
-import copy
+import queue
+import sys
+import threading
+import time
+import warnings
+from typing import Any, Callable
 
 # Define a single base format common to all handlers.
 BASE_FORMAT = (
@@ -13,22 +20,179 @@ BASE_FORMAT = (
 )
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# The environment is read once on import as it does not change for the
+# lifetime of the process.
+LOG_LEVEL = getattr(
+    logging, os.getenv(key="LOG_LEVEL", default="DEBUG").upper(), logging.DEBUG
+)
+LOG_FILE = os.getenv(key="LOG_FILE", default="combined.log")
+
+# Loggers that have already been setup, keyed by name.
+_LOGGER_CACHE: dict[str, logging.Logger] = {}
+
+# Records are passed through this queue to a single background listener so
+# that the caller's thread never blocks on I/O.
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+_LISTENER: logging.handlers.QueueListener | None = None
+# Guards starting the listener, so that only one is ever started.
+_LISTENER_LOCK = threading.Lock()
+# Set in a forked child, which does not inherit the parent's listener thread.
+_FORKED = False
+
 
 def try_create_dir(path: str):
     # Extract the directory portion of the path.
     directory = os.path.dirname(path)
     # Only attempt to create the directory if it isn't an empty string.
     if directory:
+        # Any OSError is left to the caller to handle.
+        os.makedirs(directory, exist_ok=True)
+
+
+# Define a file handler that lets the stream buffer writes instead of flushing
+# after every record, which otherwise costs a syscall per log line.
+class BufferedFileHandler(logging.FileHandler):
+    def __init__(
+        self,
+        filename: str,
+        encoding: str | None = None,
+        buffer_size: int = 8192,
+        flush_level: int = logging.ERROR,
+    ):
+        # Set before calling super() as it opens the stream.
+        self.buffer_size = buffer_size
+        # Records at or above this level are flushed immediately.
+        self.flush_level = flush_level
+        super().__init__(filename=filename, encoding=encoding)
+
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+
+    def emit(self, record):
+        # Remaining buffered records are flushed by logging.shutdown(), which
+        # the logging module registers to run at exit.
         try:
-            os.makedirs(directory, exist_ok=True)
-        except Exception as exc:
-            raise SystemExit(f"Failed to create directory: {exc}")
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+# Define a lock that does nothing, for handlers whose emit is safe to run from
+# several threads at once and therefore do not need to serialize access.
+class _NoLock:
+    def acquire(self, *args, **kwargs) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def _at_fork_reinit(self):
+        pass
+
+
+class _NoLockMixin:
+    def createLock(self):
+        self.lock = _NoLock()
+
+
+# Define a formatter that stores its result on the record, so that when
+# several handlers format the same record only the first one does the work.
+class CachedFormatter(logging.Formatter):
+    # Name of the record attribute holding the cached result.
+    cache_attr = "_pylo_cached"
+
+    def format(self, record):
+        # The cached result is tagged with the formatter that produced it, so
+        # a different formatter never returns a result in the wrong format.
+        cached = record.__dict__.get(self.cache_attr)
+        if cached is not None and cached[0] is self:
+            return cached[1]
+
+        formatted = super().format(record)
+        record.__dict__[self.cache_attr] = (self, formatted)
+        return formatted
+
+    def format_uncached(self, record):
+        return super().format(record)
+
+
+# Define a formatter for the base format that builds the line with an f-string
+# rather than the %-style engine, which looks up every field in the record's
+# dict. The output is identical to formatting with BASE_FORMAT.
+class BaseFormatter(CachedFormatter):
+    def __init__(self):
+        super().__init__(fmt=BASE_FORMAT, datefmt=DATE_FORMAT)
+        # The last formatted timestamp, with the second and date format it was
+        # formatted for. Kept as a single tuple so that it is always updated as
+        # a whole.
+        self._last_time: tuple[int, str, str] = (-1, "", "")
+
+    def formatTime(self, record, datefmt=None):
+        # Without a date format the default includes milliseconds, which is
+        # left to the base implementation.
+        if not datefmt:
+            return super().formatTime(record)
+
+        # time.strftime has a resolution of one second, so records created
+        # within the same second share the formatted timestamp, as long as
+        # they are formatted with the same date format.
+        second = int(record.created)
+        last_second, last_datefmt, last_str = self._last_time
+        if second == last_second and datefmt == last_datefmt:
+            return last_str
+
+        formatted = time.strftime(datefmt, self.converter(second))
+        self._last_time = (second, datefmt, formatted)
+        return formatted
+
+    def formatMessage(self, record):
+        # Both message and asctime are set on the record by format().
+        return (
+            f"{record.levelname} ({record.asctime}) "
+            f"[name: {record.name} func: {record.funcName}] {record.message}"
+        )
+
+
+# Shared formatter for the base format, used by the file handler and wrapped by
+# the console handler.
+_BASE_FORMATTER = BaseFormatter()
+
+
+def _build_level_colors(colors: dict[int, str]) -> tuple[str, ...]:
+    """
+    Function to build a color code for each level up to the highest level in
+    colors. Levels without a color of their own get an empty string.
+    """
+    level_colors = [""] * (max(colors) + 1)
+    for level, color in colors.items():
+        level_colors[level] = color
+    return tuple(level_colors)
 
 
 # Define a custom formatter with ANSI color codes
 class ASCIIFormatter(logging.Formatter):
     # Maximum length for the message portion of the log
     max_message_length = 100
+    # Appended to messages that have been truncated
+    truncation_suffix = "..."
 
     # ANSI escape codes for colors
     grey = "\x1b[38;21m"
@@ -38,33 +202,244 @@ class ASCIIFormatter(logging.Formatter):
     bold_red = "\x1b[31;1m"
     reset = "\x1b[0m"
 
-    # Map each logging level to a color-coded format
-    FORMATS = {
-        logging.DEBUG: grey + BASE_FORMAT + reset,
-        logging.INFO: blue + BASE_FORMAT + reset,
-        logging.WARNING: yellow + BASE_FORMAT + reset,
-        logging.ERROR: red + BASE_FORMAT + reset,
-        logging.CRITICAL: bold_red + BASE_FORMAT + reset,
+    # Map each logging level to a color
+    COLORS = {
+        logging.DEBUG: grey,
+        logging.INFO: blue,
+        logging.WARNING: yellow,
+        logging.ERROR: red,
+        logging.CRITICAL: bold_red,
     }
 
+    # The colors are stored in a tuple indexed by level number, which is
+    # cheaper than a dict lookup.
+    _COLORS = _build_level_colors(colors=COLORS)
+    _MAX_LEVEL = len(_COLORS) - 1
+
+    def __init__(self, color: bool = True):
+        super().__init__()
+        # Without color every level uses the plain base format.
+        self.color = color
+
     def format(self, record):
-        # Make a shallow copy of the record so that the original is not modified.
-        record_copy = copy.copy(record)
+        # Retrieve the color corresponding to the log record's level
+        levelno = record.levelno
+        if self.color and 0 <= levelno <= self._MAX_LEVEL:
+            level_color = self._COLORS[levelno]
+        else:
+            level_color = ""
+
+        # A plain string message without args is already the final message,
+        # so there is no need to run the %-substitution in record.getMessage().
+        if not record.args and isinstance(record.msg, str):
+            original_message = record.msg
+        else:
+            # Retrieve the original message using the record's formatting logic.
+            original_message = record.getMessage()
+
+        if len(original_message) <= self.max_message_length:
+            # Most messages fit, in which case the base format is shared with
+            # the file handler through the cache on the record.
+            formatted = _BASE_FORMATTER.format(record=record)
+        else:
+            # Truncate the message by temporarily overriding msg and args so
+            # that record.getMessage() returns the truncated version. They are
+            # restored afterwards so that other handlers still see the original
+            # record. The cache is bypassed as the result differs from theirs.
+            original_msg, original_args = record.msg, record.args
+            record.msg = (
+                f"{original_message[: self.max_message_length]}{self.truncation_suffix}"
+            )
+            record.args = None
+            try:
+                formatted = _BASE_FORMATTER.format_uncached(record=record)
+            finally:
+                record.msg, record.args = original_msg, original_args
+
+        # Wrap the formatted record in the level's color, if any.
+        if not level_color:
+            return formatted
+        return level_color + formatted + self.reset
+
+
+# Define a queue handler that only does the minimum on the caller's thread.
+# The stock QueueHandler fully formats the record and folds any traceback into
+# the message, which the console would then truncate with it. It also has no
+# lock, as SimpleQueue.put is thread-safe and prepare only touches the record
+# being logged, so threads logging at the same time never wait on each other.
+class _QueueHandler(_NoLockMixin, logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Work on a copy so that any other handler on the logger still sees the
+        # original record, as the stock QueueHandler does.
+        record = copy.copy(record)
+        # Merge the message and args now, as the args may be mutated by the
+        # caller before the listener gets to the record.
+        record.msg = record.getMessage()
+        record.args = None
+        # The traceback is kept apart from the message in exc_text, which the
+        # listener's formatters append after the (possibly truncated) message.
+        # stack_info is left as is for the same reason.
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _BASE_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        # A forked child inherits loggers that are already setup but not the
+        # listener, so one is started on first use.
+        if _LISTENER is None:
+            _start_listener()
+        super().emit(record)
 
-        # Retrieve the original message using the record's formatting logic.
-        original_message = record_copy.getMessage()
 
-        # Truncate the message if it is longer than max_message_length
-        if len(original_message) > self.max_message_length:
-            # Store the truncated version back into the record.
-            # Note: We override msg and args so that record.getMessage() returns the truncated version.
-            record_copy.msg = original_message[: self.max_message_length] + "..."
-            record_copy.args = None
+# Define a listener that flushes its handlers whenever the queue runs empty, so
+# buffered records reach the log file as soon as a burst of logging is over
+# rather than only once the buffer fills up.
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return super().dequeue(block)
 
-        # Retrieve the format corresponding to the log record's level
-        log_fmt = self.FORMATS.get(record_copy.levelno, BASE_FORMAT)
-        formatter = logging.Formatter(fmt=log_fmt, datefmt=DATE_FORMAT)
-        return formatter.format(record=record_copy)
+
+# Define a queue that hands records straight to the listener's handlers on the
+# caller's thread, flushing them after each record. Used in forked children,
+# which (e.g. with multiprocessing) commonly exit through os._exit() without
+# running the atexit hook that drains the listener.
+class _SynchronousQueue:
+    def __init__(self, listener: logging.handlers.QueueListener):
+        self.listener = listener
+
+    def put_nowait(self, record):
+        self.listener.handle(record)
+        for handler in self.listener.handlers:
+            handler.flush()
+
+
+# The same queue handler is shared by every logger. It has no lock, so threads
+# logging to different loggers do not contend on it.
+_QUEUE_HANDLER = _QueueHandler(queue=_LOG_QUEUE)
+
+
+def _start_listener():
+    """
+    Function to start the background listener that owns the console and file
+    handlers. Only the first call has any effect.
+    """
+    global _LISTENER
+    with _LISTENER_LOCK:
+        if _LISTENER is not None:
+            return
+
+        listener = _create_listener()
+        if _FORKED:
+            _QUEUE_HANDLER.queue = _SynchronousQueue(listener=listener)
+        else:
+            listener.start()
+            # Drain any queued records at exit. This is registered after the
+            # logging module's own shutdown hook, so it runs before the handlers
+            # are closed. It is registered before publishing the listener so
+            # that a started listener is always stopped.
+            atexit.register(listener.stop)
+        _LISTENER = listener
+
+
+def _before_fork():
+    # Hold the listener lock and the handlers, flushed, across the fork so that
+    # the child neither sees a half-started listener nor inherits buffered
+    # records that the parent is still going to write itself.
+    _LISTENER_LOCK.acquire()
+    if _LISTENER is not None:
+        for handler in _LISTENER.handlers:
+            handler.acquire()
+            handler.flush()
+
+
+def _after_fork_in_parent():
+    if _LISTENER is not None:
+        for handler in _LISTENER.handlers:
+            handler.release()
+    _LISTENER_LOCK.release()
+
+
+def _after_fork_in_child():
+    global _LISTENER, _LISTENER_LOCK, _FORKED
+    if _LISTENER is not None:
+        # The parent's listener thread does not exist here, so there is nothing
+        # to stop at exit. The handlers are left to logging.shutdown().
+        atexit.unregister(_LISTENER.stop)
+        for handler in _LISTENER.handlers:
+            handler.createLock()
+    _LISTENER = None
+    _LISTENER_LOCK = threading.Lock()
+    _FORKED = True
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_after_fork_in_child,
+    )
+
+
+def _create_listener() -> logging.handlers.QueueListener:
+    """
+    Function to create the (not yet started) listener along with the console
+    and file handlers it owns.
+    """
+    # CONSOLE
+    # #############
+    console_handler = logging.StreamHandler()
+    # Only use color codes when writing to a terminal, as they are just noise
+    # when the output is redirected to a file or pipe.
+    color = console_handler.stream is not None and console_handler.stream.isatty()
+    console_handler.setFormatter(fmt=ASCIIFormatter(color=color))
+
+    handlers: list[logging.Handler] = [console_handler]
+
+    # FILE
+    # #############
+    # The directory is only created here, once the first logger is setup, and
+    # failing to open the log file falls back to logging to the console only.
+    try:
+        try_create_dir(path=LOG_FILE)
+        # Setting the encoding to UTF-8 here to prevent exceptions upon
+        # handling characters such as emojis that are larger than 16-bit
+        file_handler = BufferedFileHandler(filename=LOG_FILE, encoding="utf-8")
+        file_handler.setFormatter(fmt=_BASE_FORMATTER)
+        handlers.append(file_handler)
+    except OSError as exc:
+        warnings.warn(
+            f"Failed to open log file {LOG_FILE!r}, logging to the console only: {exc}",
+            RuntimeWarning,
+            # Point at the caller of get_logger, through _start_listener.
+            stacklevel=4,
+        )
+
+    # Records are already filtered by the level set on each logger, so the
+    # handlers have no level of their own and the listener does not check it.
+    return _FlushingQueueListener(_LOG_QUEUE, *handlers)
+
+
+def log_if(
+    logger: logging.Logger,
+    level: int,
+    msg_factory: Callable[..., str],
+    *args: Any,
+) -> None:
+    """
+    Function to log a lazily built message only if the level is enabled.
+    Wrap expensive messages (e.g. f-strings containing large objects) in a
+    callable so that nothing is built when the level is disabled:
+
+        log_if(logger, logging.DEBUG, lambda: f"state: {big_object}")
+    """
+    if logger.isEnabledFor(level):
+        # Attribute the record to the caller rather than this function.
+        logger.log(level, msg_factory(*args), stacklevel=2)
 
 
 def get_logger(name: str = "") -> logging.Logger:
@@ -72,16 +447,24 @@ def get_logger(name: str = "") -> logging.Logger:
     Function to create or get a logger with the specified name.
     Defaults to using the caller's filename as the logger name.
     """
+    # Return early if the logger has already been setup.
+    if name and name in _LOGGER_CACHE:
+        return _LOGGER_CACHE[name]
+
     if not name:
-        frame = inspect.currentframe()
-        # Ensure that both the current frame and the caller's frame exist
-        if frame is not None and frame.f_back is not None:
-            caller_file = inspect.getfile(frame.f_back)  # Get caller's file path
+        try:
+            # Read the caller's file path directly from its code object, which
+            # is much cheaper than going through inspect.getfile().
+            caller_file = sys._getframe(1).f_code.co_filename
             name = os.path.basename(caller_file)  # Extract just the filename
-        else:
+        except (AttributeError, ValueError):
             # Fallback logger name if frame info is unavailable
             name = __name__
 
+        # The name could only be resolved now, so check the cache again.
+        if name in _LOGGER_CACHE:
+            return _LOGGER_CACHE[name]
+
     # MAIN LOGGER
     # #############
     logger = logging.getLogger(name)
@@ -89,36 +472,18 @@ def get_logger(name: str = "") -> logging.Logger:
     # If no handlers are found then we assume that the logger has already been
     # setup... skipping this process.
     if not logger.handlers:
-        # Get and set the log level.
-        LOG_LEVEL = getattr(
-            logging, os.getenv(key="LOG_LEVEL", default="DEBUG").upper(), logging.DEBUG
-        )
+        # Set the log level.
         logger.setLevel(level=LOG_LEVEL)
 
-        # Define the log directory and file path and try create the directory
-        # for it.
-        LOG_FILE = os.getenv(key="LOG_FILE", default="combined.log")
-        try_create_dir(path=LOG_FILE)
-
-        # CONSOLE
-        # #############
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(level=LOG_LEVEL)
-        console_handler.setFormatter(fmt=ASCIIFormatter())
-        logger.addHandler(console_handler)
-
-        # FILE
+        # QUEUE
         # #############
-        # Setting the encoding to UTF-8 here to prevent exceptions upon
-        # handling characters such as emojis that are larger than 16-bit
-        file_handler = logging.FileHandler(filename=LOG_FILE, encoding="utf-8")
-        file_handler.setLevel(level=LOG_LEVEL)
-        file_handler.setFormatter(
-            fmt=logging.Formatter(fmt=BASE_FORMAT, datefmt=DATE_FORMAT)
-        )
-        logger.addHandler(file_handler)
+        # Only enqueue the record on the caller's thread, the actual handlers
+        # are run by the background listener.
+        _start_listener()
+        logger.addHandler(_QUEUE_HANDLER)
 
         # Disable propagation to avoid duplicate logging
         logger.propagate = False
 
+    _LOGGER_CACHE[name] = logger
     return logger
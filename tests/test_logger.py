@@ -0,0 +1,255 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import textwrap
+import logging
+import time
+import unittest
+
+from pylo import log_if
+from pylo.logger import DATE_FORMAT, ASCIIFormatter, BaseFormatter, try_create_dir
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+
+def run_script(script: str, log_file: str) -> subprocess.CompletedProcess:
+    """
+    Function to run a script in a fresh interpreter, as the logger keeps
+    process-wide state (the queue listener and its handlers).
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, LOG_FILE=log_file, LOG_LEVEL="DEBUG")
+    return subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(script)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+class TestGetLogger(unittest.TestCase):
+    def test_exception_traceback_reaches_console(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "combined.log")
+            result = run_script(
+                """
+                from pylo import get_logger
+
+                log = get_logger("test")
+                try:
+                    1 / 0
+                except ZeroDivisionError:
+                    log.exception("boom")
+                """,
+                log_file=log_file,
+            )
+            with open(log_file, encoding="utf-8") as f:
+                file_output = f.read()
+
+        for output in (result.stderr, file_output):
+            self.assertIn("[name: test func: <module>] boom\n", output)
+            self.assertIn("Traceback (most recent call last):", output)
+            self.assertIn("ZeroDivisionError: division by zero", output)
+
+    def test_loggers_share_a_lock_free_queue_handler(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_script(
+                """
+                from pylo import get_logger
+                from pylo.logger import _NoLock
+
+                a, b = get_logger("a"), get_logger("b")
+                print(a.handlers == b.handlers and len(a.handlers) == 1)
+                print(isinstance(a.handlers[0].lock, _NoLock))
+                """,
+                log_file=os.path.join(tmp, "combined.log"),
+            )
+
+        self.assertEqual(result.stdout, "True\nTrue\n")
+
+    def test_other_handlers_see_the_original_record(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_script(
+                """
+                import logging
+                from pylo import get_logger
+
+                records = []
+                handler = logging.Handler()
+                handler.emit = records.append
+
+                log = get_logger("test")
+                log.addHandler(handler)
+                try:
+                    1 / 0
+                except ZeroDivisionError:
+                    log.exception("exc %s", "arg")
+                record = records[0]
+                print(record.msg, record.args, record.exc_info[0].__name__)
+                """,
+                log_file=os.path.join(tmp, "combined.log"),
+            )
+
+        self.assertEqual(result.stdout, "exc %s ('arg',) ZeroDivisionError\n")
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_forked_child_logs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "combined.log")
+            result = run_script(
+                """
+                import os
+                from pylo import get_logger
+
+                log = get_logger("test")
+                log.info("parent before fork")
+                pid = os.fork()
+                if pid == 0:
+                    log.info("child says hi")
+                    os._exit(0)
+                os.waitpid(pid, 0)
+                log.info("parent after fork")
+                """,
+                log_file=log_file,
+            )
+            with open(log_file, encoding="utf-8") as f:
+                file_output = f.read()
+
+        for output in (result.stderr, file_output):
+            for message in ("parent before fork", "child says hi", "parent after fork"):
+                self.assertEqual(output.count(f"] {message}\n"), 1)
+
+    def test_file_is_flushed_once_the_queue_is_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "combined.log")
+            result = run_script(
+                f"""
+                import time
+                from pylo import get_logger
+
+                get_logger("test").warning("flushed")
+                time.sleep(0.5)
+                with open({log_file!r}, encoding="utf-8") as f:
+                    print("flushed" in f.read())
+                """,
+                log_file=log_file,
+            )
+
+        self.assertEqual(result.stdout, "True\n")
+
+    def test_unwritable_log_file_falls_back_to_console(self):
+        with tempfile.NamedTemporaryFile() as not_a_dir:
+            result = run_script(
+                """
+                from pylo import get_logger
+
+                get_logger("test").info("console only")
+                """,
+                log_file=os.path.join(not_a_dir.name, "logs", "combined.log"),
+            )
+
+        # The warning points at the get_logger() call in the script.
+        self.assertRegex(
+            result.stderr, re.compile(r"^<string>:4: RuntimeWarning: ", re.MULTILINE)
+        )
+        self.assertIn("[name: test func: <module>] console only\n", result.stderr)
+
+    def test_no_color_codes_when_stderr_is_not_a_tty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_script(
+                """
+                from pylo import get_logger
+
+                log = get_logger("test")
+                log.info("plain")
+                log.error("plain")
+                """,
+                log_file=os.path.join(tmp, "combined.log"),
+            )
+
+        self.assertIn("INFO", result.stderr)
+        self.assertNotIn("\x1b[", result.stderr)
+
+
+class TestASCIIFormatter(unittest.TestCase):
+    def test_color_flag(self):
+        record = logging.makeLogRecord({"msg": "test", "levelno": logging.INFO})
+        colored = ASCIIFormatter(color=True).format(record)
+        self.assertTrue(colored.startswith(ASCIIFormatter.blue))
+        self.assertTrue(colored.endswith(ASCIIFormatter.reset))
+        self.assertNotIn("\x1b[", ASCIIFormatter(color=False).format(record))
+
+
+class TestTryCreateDir(unittest.TestCase):
+    def test_raises_os_error(self):
+        with tempfile.NamedTemporaryFile() as not_a_dir:
+            with self.assertRaises(OSError):
+                try_create_dir(path=os.path.join(not_a_dir.name, "logs", "x.log"))
+
+
+class TestBaseFormatter(unittest.TestCase):
+    def make_record(self, created: float) -> logging.LogRecord:
+        msecs = (created - int(created)) * 1000
+        return logging.makeLogRecord(
+            {"msg": "test", "created": created, "msecs": msecs}
+        )
+
+    def test_format_time_is_memoized_per_second(self):
+        formatter = BaseFormatter()
+        first = formatter.formatTime(self.make_record(1_000_000.1), DATE_FORMAT)
+        second = formatter.formatTime(self.make_record(1_000_000.9), DATE_FORMAT)
+        self.assertIs(first, second)
+        self.assertEqual(first, time.strftime(DATE_FORMAT, time.localtime(1_000_000)))
+        third = formatter.formatTime(self.make_record(1_000_001.0), DATE_FORMAT)
+        self.assertNotEqual(first, third)
+
+    def test_format_time_respects_datefmt(self):
+        formatter = BaseFormatter()
+        record = self.make_record(1_000_000.5)
+        self.assertEqual(
+            formatter.formatTime(record, DATE_FORMAT),
+            time.strftime(DATE_FORMAT, time.localtime(1_000_000)),
+        )
+        self.assertEqual(
+            formatter.formatTime(record, "%H:%M"),
+            time.strftime("%H:%M", time.localtime(1_000_000)),
+        )
+        # Without a date format the stdlib default, with milliseconds, is used.
+        self.assertEqual(
+            formatter.formatTime(record),
+            logging.Formatter().formatTime(record),
+        )
+        self.assertTrue(formatter.formatTime(record).endswith(",500"))
+
+
+class TestLogIf(unittest.TestCase):
+    def setUp(self):
+        # A plain logger is enough here, which avoids starting the listener.
+        self.logger = logging.getLogger("test_log_if")
+        self.logger.propagate = False
+        self.records: list[logging.LogRecord] = []
+        handler = logging.Handler()
+        handler.emit = self.records.append
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+
+    def test_factory_not_called_when_level_disabled(self):
+        self.logger.setLevel(logging.INFO)
+        calls = []
+        log_if(self.logger, logging.DEBUG, lambda: calls.append(1) or "debug")
+        self.assertEqual(calls, [])
+        self.assertEqual(self.records, [])
+
+    def test_record_is_attributed_to_the_caller(self):
+        self.logger.setLevel(logging.DEBUG)
+        log_if(self.logger, logging.INFO, lambda x: f"value: {x}", 3)
+        (record,) = self.records
+        self.assertEqual(record.getMessage(), "value: 3")
+        self.assertEqual(record.funcName, "test_record_is_attributed_to_the_caller")
+        self.assertEqual(record.pathname, __file__)
+
+
+if __name__ == "__main__":
+    unittest.main()